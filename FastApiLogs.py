@@ -4,16 +4,108 @@ Parses large log files, identifies top 5 IPs with 500 errors,
 and sends alerts if error rate exceeds threshold.
 """
 
+import os
 import re
+import mmap
+import stat
 import heapq
 from collections import Counter, defaultdict
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from operator import itemgetter
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple, Optional, TextIO
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 import json
 import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
+from email.message import EmailMessage
+
+try:
+    import re2  # Optional: Google RE2 bindings (pip install google-re2)
+except ImportError:
+    re2 = None
+
+
+class SpaceSaving:
+    """
+    Bounded-memory heavy-hitter counter (Metwally et al. Space-Saving).
+    
+    Tracks at most ``capacity`` items. When full, a new item replaces the
+    item with the smallest count and inherits that count, so counts may be
+    overestimated by at most the evicted count but true heavy hitters are
+    never lost. Supports the parts of the Counter API the parser uses.
+    """
+    
+    __slots__ = ('capacity', 'counts', '_heap')
+    
+    def __init__(self, capacity: int = 1000):
+        """
+        Initialize the sketch.
+        
+        Args:
+            capacity: Maximum number of items to track
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.counts: Dict[str, int] = {}
+        # One (count, item) entry per tracked item; the count may lag behind
+        # self.counts and is refreshed when the entry reaches the top
+        self._heap: List[Tuple[int, str]] = []
+    
+    def add(self, item: str, count: int = 1) -> None:
+        """
+        Add count occurrences of item.
+        
+        Args:
+            item: Item to count
+            count: Number of occurrences
+        """
+        counts = self.counts
+        if item in counts:
+            counts[item] += count
+            return
+        
+        if len(counts) >= self.capacity:
+            floor = self._evict_min()
+            count += floor
+        counts[item] = count
+        heapq.heappush(self._heap, (count, item))
+    
+    def _evict_min(self) -> int:
+        """Remove the item with the smallest count and return that count."""
+        heap = self._heap
+        counts = self.counts
+        while True:
+            count, item = heap[0]
+            if counts[item] == count:
+                heapq.heappop(heap)
+                del counts[item]
+                return count
+            heapq.heapreplace(heap, (counts[item], item))
+    
+    def update(self, items) -> None:
+        """
+        Add items from an iterable or an item -> count mapping.
+        
+        Args:
+            items: Iterable of items or mapping of item counts
+        """
+        if hasattr(items, 'items'):
+            for item, count in items.items():
+                self.add(item, count)
+        else:
+            for item in items:
+                self.add(item)
+    
+    def items(self):
+        """Return (item, count) pairs for tracked items."""
+        return self.counts.items()
+    
+    def __getitem__(self, item: str) -> int:
+        return self.counts.get(item, 0)
+    
+    def __len__(self) -> int:
+        return len(self.counts)
 
 
 class LogParser:
@@ -22,27 +114,100 @@ class LogParser:
     Supports Apache/Nginx common log format and custom formats.
     """
     
-    # Common log format regex patterns
+    # No per-instance __dict__; counters are read on every batch
+    __slots__ = (
+        'log_format', 'time_window_minutes', 'use_re2', 'max_tracked_ips',
+        'line_pattern', 'ip_500_errors', 'ip_total_requests',
+        'processed_files', 'total_requests',
+        'total_500_errors', 'parse_errors', '_window_cutoff', '_window_cache',
+    )
+    
+    # Common log format regex patterns. Bounded octets and a fixed-width
+    # status keep failed matches on malformed lines from backtracking far.
     APACHE_COMMON = re.compile(
-        r'(?P<ip>\d+\.\d+\.\d+\.\d+) - - \[(?P<datetime>[^\]]+)\] '
+        r'(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) '
+        r'- - \[(?P<datetime>[^\]]+)\] '
         r'"(?P<method>\w+) (?P<path>[^\s]+) HTTP/[^"]*" '
-        r'(?P<status>\d+) (?P<size>\d+|-)'
+        r'(?P<status>\d{3}) (?P<size>\d+|-)',
+        re.ASCII
     )
     
     NGINX_COMBINED = re.compile(
-        r'(?P<ip>\d+\.\d+\.\d+\.\d+) - - \[(?P<datetime>[^\]]+)\] '
+        r'(?P<ip>\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}) '
+        r'- - \[(?P<datetime>[^\]]+)\] '
         r'"(?P<method>\w+) (?P<path>[^\s]+) HTTP/[^"]*" '
-        r'(?P<status>\d+) (?P<size>\d+|-) '
-        r'"(?P<referrer>[^"]*)" "(?P<user_agent>[^"]*)"'
+        r'(?P<status>\d{3}) (?P<size>\d+|-) '
+        r'"(?P<referrer>[^"]*)" "(?P<user_agent>[^"]*)"',
+        re.ASCII
+    )
+    
+    # Byte-level line start: after \n or a bare \r, since text mode reads
+    # \n, \r and \r\n alike as line breaks. A \r ending a batch is either
+    # half of a \r\n or the end of the file, so it starts no new line.
+    LINE_START = rb'(?:^|(?<=\r)(?!\n|\Z))'
+    
+    # UTF-8 whitespace that str.strip() removes from the start of a line
+    LEADING_SPACE = (
+        rb'(?:[\t\x0b\x0c\x1c-\x1f ]|\xc2[\x85\xa0]|\xe1\x9a\x80'
+        rb'|\xe2\x80[\x80-\x8a\xa8\xa9\xaf]|\xe2\x81\x9f|\xe3\x80\x80)*'
     )
     
+    # Byte-level source for the client IP, and for the fields after it
+    # capturing (datetime, status)
+    IPV4 = rb'\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}'
+    
+    APACHE_COMMON_FIELDS = (
+        rb' - - \[([^\]\r\n]+)\] '
+        rb'"\w+ [^\s]+ HTTP/[^"\r\n]*" '
+        rb'(\d{3}) (?:\d+|-)'
+    )
+    
+    NGINX_COMBINED_FIELDS = (
+        APACHE_COMMON_FIELDS + rb' "[^"\r\n]*" "[^"\r\n]*"'
+    )
+    
+    # Byte-level scan patterns for the mmap fast path. Every line start yields
+    # exactly one match with groups (ip, datetime, status, garbage): the first
+    # three are set for a valid record, the last one for an unparseable line,
+    # and all are empty for a blank line. The trailing [^\r\n]* consumes the
+    # rest of the line so the engine does not retry at every byte of it.
+    APACHE_COMMON_SCAN = re.compile(
+        LINE_START + LEADING_SPACE + rb'(?:(' + IPV4 + rb')' +
+        APACHE_COMMON_FIELDS + rb'|(\S))?[^\r\n]*',
+        re.MULTILINE
+    )
+    
+    NGINX_COMBINED_SCAN = re.compile(
+        LINE_START + LEADING_SPACE + rb'(?:(' + IPV4 + rb')' +
+        NGINX_COMBINED_FIELDS + rb'|(\S))?[^\r\n]*',
+        re.MULTILINE
+    )
+    
+    # Bytes of the mapped file handed to the scan pattern per batch
+    SCAN_BATCH_SIZE = 4 * 1024 * 1024
+    
+    # Largest shard handed to a worker process; large files are split into
+    # more shards than workers so the parent can report progress
+    SHARD_SIZE = 64 * 1024 * 1024
+    
+    # Bytes read per chunk when a file is processed line by line
+    READ_CHUNK_SIZE = 1024 * 1024
+    
+    # Characters \s matches in the ASCII line patterns
+    ASCII_SPACE = frozenset(' \t\n\r\x0b\x0c')
+    
     # JSON format for modern applications
     JSON_FORMAT = 'json'
     
+    # Max distinct timestamps remembered by is_within_time_window
+    WINDOW_CACHE_SIZE = 4096
+    
     def __init__(
         self,
         log_format: str = 'apache',
-        time_window_minutes: Optional[int] = None
+        time_window_minutes: Optional[int] = None,
+        use_re2: bool = False,
+        max_tracked_ips: Optional[int] = None
     ):
         """
         Initialize the log parser.
@@ -50,16 +215,43 @@ class LogParser:
         Args:
             log_format: 'apache', 'nginx', or 'json'
             time_window_minutes: If set, only count errors within this time window
+            use_re2: Match lines with Google RE2 instead of re. RE2 runs in
+                linear time on any input, at the cost of slower matching.
+            max_tracked_ips: If set, track 500 errors for at most this many
+                IPs with a Space-Saving sketch (bounded memory, approximate
+                counts outside the heaviest hitters)
         """
+        if use_re2 and re2 is None:
+            raise ImportError("use_re2 requires the google-re2 package")
+        
         self.log_format = log_format
         self.time_window_minutes = time_window_minutes
-        self.ip_500_errors = Counter()
+        self.use_re2 = use_re2
+        self.max_tracked_ips = max_tracked_ips
+        
+        if log_format == 'nginx':
+            self.line_pattern = self.NGINX_COMBINED
+        else:  # apache or default
+            self.line_pattern = self.APACHE_COMMON
+        if use_re2:
+            self.line_pattern = re2.compile(self.line_pattern.pattern)
+        
+        if max_tracked_ips:
+            self.ip_500_errors = SpaceSaving(max_tracked_ips)
+        else:
+            self.ip_500_errors = Counter()
+        # Per-IP request totals from inputs that cannot be rescanned
         self.ip_total_requests = Counter()
+        # (path, device, inode, size) of each regular file processed, so a
+        # rescan can tell whether the file was replaced or truncated since
+        self.processed_files: List[Tuple[str, int, int, int]] = []
         self.total_requests = 0
         self.total_500_errors = 0
         self.parse_errors = 0
+        self._window_cutoff = None
+        self._window_cache = {}
         
-    def parse_line(self, line: str) -> Optional[Dict[str, str]]:
+    def parse_line(self, line: str) -> Optional[Tuple[str, str, str]]:
         """
         Parse a single log line and extract relevant fields.
         
@@ -67,7 +259,8 @@ class LogParser:
             line: Single line from log file
             
         Returns:
-            Dictionary with parsed fields or None if parsing fails
+            (ip, status, datetime) tuple or None if parsing fails. Fields
+            missing from a JSON entry are None, and its status may be numeric.
         """
         line = line.strip()
         if not line:
@@ -75,14 +268,48 @@ class LogParser:
             
         try:
             if self.log_format == 'json':
-                return json.loads(line)
-            elif self.log_format == 'nginx':
-                match = self.NGINX_COMBINED.match(line)
-            else:  # apache or default
-                match = self.APACHE_COMMON.match(line)
+                entry = json.loads(line)
+                if not isinstance(entry, dict):
+                    self.parse_errors += 1
+                    return None
+                # Handle both key formats
+                return (entry.get('ip') or entry.get('remote_addr'),
+                        entry.get('status') or entry.get('status_code'),
+                        entry.get('datetime') or entry.get('timestamp'))
+            
+            if self.use_re2 and self.log_format == 'apache':
+                # Each RE2 call is expensive from Python, so take well-formed
+                # common log lines apart with str.split and leave only the
+                # unusual ones to the regex.
+                parts = line.split(' ', 10)
+                if len(parts) >= 10:
+                    (ip, ident, user, stamp, zone, method, path, protocol,
+                     status, size) = parts[:10]
+                    octets = ip.split('.')
+                    # Accept only what the regex would match, with the same
+                    # fields: \w+ method, no ] inside the brackets, no " before
+                    # the closing quote and a path free of ASCII whitespace
+                    if (ident == user == '-' and stamp[:1] == '['
+                            and zone[-1:] == ']' and ']' not in stamp
+                            and ']' not in zone[:-1] and method[:1] == '"'
+                            and method[1:].isascii()
+                            and method[1:].replace('_', 'a').isalnum()
+                            and path and self.ASCII_SPACE.isdisjoint(path)
+                            and protocol[:5] == 'HTTP/' and protocol[-1:] == '"'
+                            and '"' not in protocol[:-1]
+                            and len(status) == 3 and status.isdecimal()
+                            and (size.isdecimal() or size == '-')
+                            # isdecimal() also accepts non-ASCII digits
+                            and ip.isascii() and status.isascii()
+                            and size.isascii() and len(octets) == 4
+                            and all(len(octet) <= 3 and octet.isdecimal()
+                                    for octet in octets)):
+                        return ip, status, stamp[1:] + ' ' + zone[:-1]
+            
+            match = self.line_pattern.match(line)
                 
             if match:
-                return match.groupdict()
+                return match.group('ip', 'status', 'datetime')
             else:
                 self.parse_errors += 1
                 return None
@@ -103,65 +330,82 @@ class LogParser:
         """
         if not self.time_window_minutes:
             return True
-            
+        
+        # JSON logs may hold any value here; only strings can be parsed
+        if not isinstance(log_datetime, str):
+            return True  # Include if we can't parse the time
+        
+        # Log lines arrive in bursts sharing a timestamp, so strptime only
+        # runs once per distinct timestamp
+        within = self._window_cache.get(log_datetime)
+        if within is not None:
+            return within
+        
+        if self._window_cutoff is None:
+            self._window_cutoff = (
+                datetime.now() - timedelta(minutes=self.time_window_minutes)
+            )
+        
         try:
             # Parse common log datetime format: 01/Jan/2026:12:00:00 +0000
             log_time = datetime.strptime(
                 log_datetime.split()[0],
                 '%d/%b/%Y:%H:%M:%S'
             )
-            now = datetime.now()
-            diff_minutes = (now - log_time).total_seconds() / 60
-            return diff_minutes <= self.time_window_minutes
+            within = log_time >= self._window_cutoff
         except Exception:
-            return True  # Include if we can't parse the time
+            within = True  # Include if we can't parse the time
+        
+        if len(self._window_cache) >= self.WINDOW_CACHE_SIZE:
+            self._window_cache.clear()
+        self._window_cache[log_datetime] = within
+        return within
     
-    def process_file(self, filepath: str, chunk_size: int = 8192) -> None:
+    def process_file(
+        self,
+        filepath: str,
+        chunk_size: int = READ_CHUNK_SIZE,
+        workers: int = 1
+    ) -> None:
         """
-        Process log file line by line without loading into memory.
+        Process log file without loading it into memory.
+        
+        Apache and Nginx logs are memory-mapped and scanned with a single
+        byte-level regex sweep, optionally split across worker processes;
+        JSON logs, RE2 matching and files that cannot be mapped are streamed
+        line by line.
         
         Args:
             filepath: Path to log file
             chunk_size: Buffer size for reading file
+            workers: Number of processes scanning a mapped file in parallel
         """
         print(f"Processing log file: {filepath}")
         print(f"Using {chunk_size} byte chunks for memory efficiency\n")
         
-        with open(filepath, 'r', encoding='utf-8', errors='ignore') as f:
-            line_count = 0
-            
-            for line in f:
-                line_count += 1
-                
-                # Progress indicator for large files
-                if line_count % 100000 == 0:
-                    print(f"Processed {line_count:,} lines... "
-                          f"(Found {self.total_500_errors:,} 500 errors)")
-                
-                parsed = self.parse_line(line)
-                if not parsed:
-                    continue
-                
-                # Extract fields (handle both dict key formats)
-                ip = parsed.get('ip') or parsed.get('remote_addr')
-                status = parsed.get('status') or parsed.get('status_code')
-                log_time = parsed.get('datetime') or parsed.get('timestamp')
-                
-                if not ip or not status:
-                    continue
-                
-                # Check time window if specified
-                if log_time and not self.is_within_time_window(log_time):
-                    continue
-                
-                # Track statistics
-                self.total_requests += 1
-                self.ip_total_requests[ip] += 1
-                
-                # Track 500 errors
-                if str(status).startswith('5'):
-                    self.total_500_errors += 1
-                    self.ip_500_errors[ip] += 1
+        # Measure the time window from the start of this file
+        self._window_cutoff = None
+        self._window_cache.clear()
+        
+        # A regular file is processed up to its current size, so a rescan
+        # sees the same lines even if the log keeps growing. Pipes and other
+        # inputs can only be read once.
+        file_stat = os.stat(filepath)
+        size = file_stat.st_size if stat.S_ISREG(file_stat.st_mode) else None
+        
+        mapped = self._map_file(filepath, size)
+        if mapped is not None:
+            with mapped:
+                if workers > 1 and len(mapped) > self.SCAN_BATCH_SIZE:
+                    line_count = self._scan_parallel(filepath, mapped, workers)
+                else:
+                    line_count = self._scan_mapped(mapped)
+        else:
+            line_count = self._process_lines(filepath, chunk_size, size)
+        if size is not None:
+            self.processed_files.append(
+                (filepath, file_stat.st_dev, file_stat.st_ino, size)
+            )
         
         print(f"\nProcessing complete!")
         print(f"Total lines processed: {line_count:,}")
@@ -169,6 +413,537 @@ class LogParser:
         print(f"Total 500 errors: {self.total_500_errors:,}")
         print(f"Parse errors: {self.parse_errors:,}\n")
     
+    def _map_file(self, filepath: str, size: Optional[int]) -> Optional[mmap.mmap]:
+        """
+        Memory-map the start of a log file for the byte-level scan.
+        
+        Args:
+            filepath: Path to log file
+            size: Bytes to map, or None if the file is not a regular file
+            
+        Returns:
+            Read-only memory map, or None if the file should be read line by line
+        """
+        if self.log_format == 'json' or self.use_re2 or not size:
+            return None
+        
+        with open(filepath, 'rb') as f:
+            try:
+                return mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+            except (ValueError, OSError):
+                # The file shrank below size or cannot be mapped
+                return None
+    
+    def _find_line_break(self, buffer: mmap.mmap, pos: int, stop: int) -> int:
+        """
+        Find the first line break at or after pos.
+        
+        The buffer is searched one batch-sized window at a time, so a file
+        that only uses \r is not searched to the end for a \n.
+        
+        Args:
+            buffer: Read-only memory map of the log file
+            pos: Offset to search from
+            stop: Offset to search up to
+            
+        Returns:
+            Offset of the \n or bare \r ending the line, or -1 if none
+        """
+        while pos < stop:
+            limit = min(pos + self.SCAN_BATCH_SIZE, stop)
+            newline = buffer.find(b'\n', pos, limit)
+            cr = buffer.find(b'\r', pos, limit if newline == -1 else newline)
+            if cr != -1:
+                # A \r\n ends at its \n
+                if cr + 1 < stop and buffer[cr + 1] == 0x0A:
+                    return cr + 1
+                return cr
+            if newline != -1:
+                return newline
+            pos = limit
+        return -1
+    
+    def _scan_batches(self, buffer: mmap.mmap, start: int = 0,
+                      stop: Optional[int] = None):
+        """
+        Split a mapped file, or a line-aligned range of it, into batches.
+        
+        Args:
+            buffer: Read-only memory map of the log file
+            start: Offset of the first line in the range
+            stop: Offset just past the last line in the range (default: EOF)
+            
+        Yields:
+            (start, end) byte offsets of each batch, excluding a final \n
+        """
+        if stop is None:
+            stop = len(buffer)
+        while start < stop:
+            end = self._find_line_break(
+                buffer, start + self.SCAN_BATCH_SIZE, stop
+            )
+            if end == -1:
+                # A trailing newline ends the last line, it does not start one
+                end = stop - 1 if buffer[stop - 1] == 0x0A else stop
+                yield start, end
+            elif buffer[end] == 0x0D:
+                # Keep a bare \r in the batch, where it ends the last line
+                yield start, end + 1
+            else:
+                yield start, end
+            start = end + 1
+    
+    def _scan_mapped(
+        self,
+        buffer: mmap.mmap,
+        start: int = 0,
+        stop: Optional[int] = None,
+        show_progress: bool = True
+    ) -> int:
+        """
+        Count requests and 500 errors in a memory-mapped log file.
+        
+        The buffer is scanned in line-aligned batches. Each batch is
+        parsed by a single findall call and, without a time window, counted
+        with bulk Counter updates so no Python code runs per line.
+        
+        Args:
+            buffer: Read-only memory map of the log file
+            start: Offset of the first line to scan
+            stop: Offset just past the last line to scan (default: EOF)
+            show_progress: Print a progress line every 100k lines
+            
+        Returns:
+            Number of lines scanned
+        """
+        if self.log_format == 'nginx':
+            findall = self.NGINX_COMBINED_SCAN.findall
+        else:  # apache or default
+            findall = self.APACHE_COMMON_SCAN.findall
+        
+        # Count raw byte keys locally and decode each distinct IP on merge
+        ip_500_errors = Counter()
+        line_count = 0
+        
+        for batch_start, batch_end in self._scan_batches(buffer, start, stop):
+            rows = findall(buffer, batch_start, batch_end)
+            
+            # Progress indicator for large files
+            if (show_progress and
+                    (line_count + len(rows)) // 100000 > line_count // 100000):
+                print(f"Processed {line_count + len(rows):,} lines... "
+                      f"(Found {self.total_500_errors:,} 500 errors)")
+            line_count += len(rows)
+            
+            if self.time_window_minutes:
+                is_within_time_window = self.is_within_time_window
+                requests = 0
+                parse_errors = 0
+                errors = []
+                for ip, log_time, status, garbage in rows:
+                    if not ip:
+                        if garbage:
+                            parse_errors += 1
+                        continue
+                    
+                    # Check time window if specified
+                    if not is_within_time_window(log_time.decode('utf-8', 'ignore')):
+                        continue
+                    
+                    requests += 1
+                    if status[:1] == b'5':
+                        errors.append(ip)
+                
+                self.total_requests += requests
+                self.parse_errors += parse_errors
+            else:
+                # Blank and unparseable lines have an empty IP
+                ips = list(map(itemgetter(0), rows))
+                garbage = list(map(itemgetter(3), rows))
+                self.total_requests += len(ips) - ips.count(b'')
+                self.parse_errors += len(garbage) - garbage.count(b'')
+                errors = [ip for ip, _, status, _ in rows if status[:1] == b'5']
+            
+            self.total_500_errors += len(errors)
+            ip_500_errors.update(errors)
+            
+            # Merge errors per batch so a bounded ip_500_errors stays bounded
+            self.ip_500_errors.update(
+                {ip.decode('ascii'): count for ip, count in ip_500_errors.items()}
+            )
+            ip_500_errors.clear()
+        
+        return line_count
+    
+    def _scan_parallel(self, filepath: str, buffer: mmap.mmap, workers: int) -> int:
+        """
+        Scan a mapped file in line-aligned shards across worker processes.
+        
+        Workers map the same file, so they share the page cache, and each
+        returns only its totals and per-IP error counts for merging. A
+        progress line is printed as each shard is merged.
+        
+        Args:
+            filepath: Path to log file
+            buffer: Read-only memory map of the log file
+            workers: Number of worker processes
+            
+        Returns:
+            Number of lines scanned
+        """
+        # Workers measure the time window from the same moment
+        if self.time_window_minutes and self._window_cutoff is None:
+            self._window_cutoff = (
+                datetime.now() - timedelta(minutes=self.time_window_minutes)
+            )
+        
+        tasks = [
+            (filepath, start, stop, self.log_format, self.time_window_minutes,
+             self._window_cutoff, self.max_tracked_ips)
+            for start, stop in self._shard_bounds(buffer, workers)
+        ]
+        print(f"Scanning {len(tasks)} shards with {workers} worker processes")
+        
+        line_count = 0
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for (lines, requests, errors, parse_errors,
+                 ip_500_errors) in executor.map(_scan_shard, tasks):
+                line_count += lines
+                self.total_requests += requests
+                self.total_500_errors += errors
+                self.parse_errors += parse_errors
+                self.ip_500_errors.update(ip_500_errors)
+                
+                # Progress indicator, as workers print none
+                print(f"Processed {line_count:,} lines... "
+                      f"(Found {self.total_500_errors:,} 500 errors)")
+        return line_count
+    
+    def _shard_bounds(self, buffer: mmap.mmap, workers: int) -> List[Tuple[int, int]]:
+        """
+        Split a mapped file into line-aligned shards for worker processes.
+        
+        Args:
+            buffer: Read-only memory map of the log file
+            workers: Number of worker processes
+            
+        Returns:
+            (start, stop) byte offsets of each non-empty shard
+        """
+        size = len(buffer)
+        shards = max(workers, -(-size // self.SHARD_SIZE))
+        
+        # Snap each shard boundary forward to the start of the next line
+        bounds = [0]
+        for i in range(1, shards):
+            newline = self._find_line_break(
+                buffer, max(size * i // shards, bounds[-1]), size
+            )
+            if newline == -1:
+                break
+            bounds.append(newline + 1)
+        bounds.append(size)
+        
+        return [
+            (start, stop) for start, stop in zip(bounds, bounds[1:])
+            if start < stop
+        ]
+    
+    def _read_lines(self, filepath: str, chunk_size: int,
+                    size: Optional[int] = None):
+        """
+        Read a file as text lines using large binary chunks.
+        
+        Each run of complete lines is decoded with a single call, avoiding
+        per-line text I/O overhead.
+        
+        Args:
+            filepath: Path to log file
+            chunk_size: Bytes to read per chunk
+            size: Bytes to read from the start of the file (default: all)
+            
+        Yields:
+            Lines without their trailing newline
+        """
+        with open(filepath, 'rb') as f:
+            pending = b''
+            remaining = size
+            while True:
+                if remaining is None:
+                    chunk = f.read(chunk_size)
+                else:
+                    chunk = f.read(min(chunk_size, remaining))
+                    remaining -= len(chunk)
+                if chunk:
+                    # Hold back the partial last line until the next chunk,
+                    # and a final \r that may be half of a \r\n
+                    chunk = pending + chunk
+                    cut = max(chunk.rfind(b'\n'),
+                              chunk.rfind(b'\r', 0, -1)) + 1
+                    pending = chunk[cut:]
+                    chunk = chunk[:cut]
+                elif pending:
+                    chunk, pending = pending, b''
+                else:
+                    break
+                
+                text = chunk.decode('utf-8', errors='ignore')
+                if '\r' in text:
+                    # Universal newlines, as in text mode
+                    text = text.replace('\r\n', '\n').replace('\r', '\n')
+                lines = text.split('\n')
+                if lines[-1] == '':
+                    lines.pop()  # Nothing follows the final newline
+                yield from lines
+    
+    def _process_lines(self, filepath: str, chunk_size: int,
+                       size: Optional[int] = None) -> int:
+        """
+        Process log file line by line using parse_line.
+        
+        Args:
+            filepath: Path to log file
+            chunk_size: Bytes to read per chunk
+            size: Bytes of a regular file to read, or None for an input that
+                cannot be rescanned, whose per-IP totals are counted now
+            
+        Returns:
+            Number of lines read
+        """
+        line_count = 0
+        requests = 0
+        
+        # 500 error IPs are collected in a list and counted every 100k lines
+        error_ips = []
+        request_ips = [] if size is None else None
+        
+        # Bind per-line callables once instead of looking them up every line
+        parse_line = self.parse_line
+        is_within_time_window = self.is_within_time_window
+        add_error = error_ips.append
+        
+        for line in self._read_lines(filepath, chunk_size, size):
+            line_count += 1
+            
+            # Progress indicator for large files
+            if line_count % 100000 == 0:
+                self._count_errors(error_ips)
+                if request_ips:
+                    self.ip_total_requests.update(request_ips)
+                    request_ips.clear()
+                print(f"Processed {line_count:,} lines... "
+                      f"(Found {self.total_500_errors:,} 500 errors)")
+            
+            parsed = parse_line(line)
+            if parsed is None:
+                continue
+            
+            ip, status, log_time = parsed
+            if not ip or not status:
+                continue
+            
+            # Check time window if specified
+            if log_time and not is_within_time_window(log_time):
+                continue
+            
+            # Track statistics
+            requests += 1
+            if request_ips is not None:
+                request_ips.append(ip)
+            
+            # Track 500 errors (JSON logs may give a numeric status)
+            if isinstance(status, str):
+                is_error = status[0] == '5'
+            elif isinstance(status, (int, float)):
+                is_error = 500 <= status < 600
+            else:
+                is_error = False
+            if is_error:
+                add_error(ip)
+        
+        self._count_errors(error_ips)
+        if request_ips:
+            self.ip_total_requests.update(request_ips)
+        self.total_requests += requests
+        return line_count
+    
+    def _count_errors(self, error_ips: List[str]) -> None:
+        """
+        Add a batch of 500 error IPs to the counters.
+        
+        Args:
+            error_ips: IP of every 500 error; cleared afterwards
+        """
+        self.total_500_errors += len(error_ips)
+        self.ip_500_errors.update(error_ips)
+        error_ips.clear()
+    
+    def get_ip_request_counts(
+        self,
+        ips: List[str],
+        workers: int = 1
+    ) -> Optional[Dict[str, int]]:
+        """
+        Count all requests made by the given IPs in the processed files.
+        
+        Per-IP request totals are not kept while processing regular files,
+        since only the top IPs are ever reported. Instead those files are
+        rescanned for just these IPs, up to the size they had when processed
+        and applying the same parsing and time window rules. Totals for
+        pipes and other inputs that cannot be reread are counted while
+        processing.
+        
+        Args:
+            ips: IPs to count, typically from get_top_ips
+            workers: Number of processes rescanning a mapped file in parallel
+            
+        Returns:
+            Dictionary mapping each IP to its request count, or None if a
+            processed file was removed, replaced or truncated since
+        """
+        counts = {ip: self.ip_total_requests[ip] for ip in ips}
+        if not counts:
+            return counts
+        
+        # A rotated or truncated log no longer holds the lines that were
+        # counted, so its totals would not match the error counts
+        for filepath, device, inode, size in self.processed_files:
+            try:
+                file_stat = os.stat(filepath)
+            except OSError:
+                return None
+            if (file_stat.st_dev != device or file_stat.st_ino != inode
+                    or file_stat.st_size < size):
+                return None
+        
+        for filepath, _, _, size in self.processed_files:
+            mapped = self._map_file(filepath, size)
+            if mapped is not None:
+                with mapped:
+                    if workers > 1 and len(mapped) > self.SCAN_BATCH_SIZE:
+                        self._count_ips_parallel(
+                            filepath, mapped, counts, workers
+                        )
+                    else:
+                        self._count_ips_mapped(mapped, counts)
+            else:
+                self._count_ips_lines(filepath, size, counts)
+        return counts
+    
+    def _count_ips_parallel(
+        self,
+        filepath: str,
+        buffer: mmap.mmap,
+        counts: Dict[str, int],
+        workers: int
+    ) -> None:
+        """
+        Add requests from the IPs in counts, rescanning shards in parallel.
+        
+        Uses the same shards and time window cutoff as _scan_parallel.
+        
+        Args:
+            filepath: Path to log file
+            buffer: Read-only memory map of the log file
+            counts: IP -> request count, updated in place
+            workers: Number of worker processes
+        """
+        if self.time_window_minutes and self._window_cutoff is None:
+            self._window_cutoff = (
+                datetime.now() - timedelta(minutes=self.time_window_minutes)
+            )
+        
+        tasks = [
+            (filepath, start, stop, self.log_format, self.time_window_minutes,
+             self._window_cutoff, list(counts))
+            for start, stop in self._shard_bounds(buffer, workers)
+        ]
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for shard_counts in executor.map(_count_ips_shard, tasks):
+                for ip, count in shard_counts.items():
+                    counts[ip] += count
+    
+    def _count_ips_mapped(
+        self,
+        buffer: mmap.mmap,
+        counts: Dict[str, int],
+        start: int = 0,
+        stop: Optional[int] = None
+    ) -> None:
+        """
+        Add requests from the IPs in counts found in a mapped file.
+        
+        Args:
+            buffer: Read-only memory map of the log file
+            counts: IP -> request count, updated in place
+            start: Offset of the first line to scan
+            stop: Offset just past the last line to scan (default: EOF)
+        """
+        if self.log_format == 'nginx':
+            fields = self.NGINX_COMBINED_FIELDS
+        else:  # apache or default
+            fields = self.APACHE_COMMON_FIELDS
+        
+        # Only lines from the wanted IPs match, so few rows reach Python
+        wanted = b'|'.join(re.escape(ip.encode('ascii')) for ip in counts)
+        findall = re.compile(
+            self.LINE_START + self.LEADING_SPACE + rb'(' + wanted + rb')' +
+            fields,
+            re.MULTILINE
+        ).findall
+        
+        ip_requests = Counter()
+        for batch_start, batch_end in self._scan_batches(buffer, start, stop):
+            rows = findall(buffer, batch_start, batch_end)
+            if self.time_window_minutes:
+                ip_requests.update(
+                    ip for ip, log_time, _ in rows
+                    if self.is_within_time_window(log_time.decode('utf-8', 'ignore'))
+                )
+            else:
+                ip_requests.update(map(itemgetter(0), rows))
+        
+        for ip, count in ip_requests.items():
+            counts[ip.decode('ascii')] += count
+    
+    def _count_ips_lines(self, filepath: str, size: int,
+                         counts: Dict[str, int]) -> None:
+        """
+        Add requests from the IPs in counts found in a file read line by line.
+        
+        Args:
+            filepath: Path to log file
+            size: Bytes to read from the start of the file
+            counts: IP -> request count, updated in place
+        """
+        # Only lines mentioning a wanted IP are parsed. JSON logs may give a
+        # non-string IP or escape its characters, so those lines are all
+        # parsed.
+        if all(isinstance(ip, str) for ip in counts):
+            search = re.compile('|'.join(map(re.escape, counts))).search
+        else:
+            search = None
+        parse_errors = self.parse_errors
+        
+        for line in self._read_lines(filepath, self.READ_CHUNK_SIZE, size):
+            if search and '\\' not in line and not search(line):
+                continue
+            
+            parsed = self.parse_line(line)
+            if parsed is None:
+                continue
+            
+            ip, status, log_time = parsed
+            if ip not in counts or not status:
+                continue
+            if log_time and not self.is_within_time_window(log_time):
+                continue
+            counts[ip] += 1
+        
+        # Unparseable lines were already counted by process_file
+        self.parse_errors = parse_errors
+    
     def get_top_ips(self, n: int = 5) -> List[Tuple[str, int]]:
         """
         Get top N IPs with most 500 errors using heap for efficiency.
@@ -179,8 +954,13 @@ class LogParser:
         Returns:
             List of (IP, error_count) tuples
         """
-        # heapq.nlargest is memory efficient for getting top N
-        return heapq.nlargest(n, self.ip_500_errors.items(), key=lambda x: x[1])
+        # A plain sort wins on small sets; heapq.nlargest is memory
+        # efficient for getting top N out of many IPs
+        if len(self.ip_500_errors) <= 2 * n:
+            return sorted(
+                self.ip_500_errors.items(), key=itemgetter(1), reverse=True
+            )[:n]
+        return heapq.nlargest(n, self.ip_500_errors.items(), key=itemgetter(1))
     
     def calculate_error_rate(self) -> float:
         """
@@ -194,11 +974,93 @@ class LogParser:
         return (self.total_500_errors / self.total_requests) * 100
 
 
+def _scan_shard(task: Tuple) -> Tuple[int, int, int, int, Dict[str, int]]:
+    """
+    Scan one line-aligned byte range of a log file in a worker process.
+    
+    Args:
+        task: (filepath, start, stop, log_format, time_window_minutes,
+            window_cutoff, max_tracked_ips)
+        
+    Returns:
+        (lines, requests, 500 errors, parse errors, IP -> 500 error count)
+    """
+    (filepath, start, stop, log_format, time_window_minutes,
+     window_cutoff, max_tracked_ips) = task
+    
+    parser = LogParser(
+        log_format=log_format,
+        time_window_minutes=time_window_minutes,
+        max_tracked_ips=max_tracked_ips
+    )
+    parser._window_cutoff = window_cutoff
+    
+    with _map_shard(parser, filepath, stop) as mapped:
+        line_count = parser._scan_mapped(mapped, start, stop, show_progress=False)
+    
+    return (
+        line_count,
+        parser.total_requests,
+        parser.total_500_errors,
+        parser.parse_errors,
+        dict(parser.ip_500_errors.items()),
+    )
+
+
+def _count_ips_shard(task: Tuple) -> Dict[str, int]:
+    """
+    Count requests from given IPs in one byte range of a log file.
+    
+    Args:
+        task: (filepath, start, stop, log_format, time_window_minutes,
+            window_cutoff, ips)
+        
+    Returns:
+        IP -> request count within the range
+    """
+    (filepath, start, stop, log_format, time_window_minutes,
+     window_cutoff, ips) = task
+    
+    parser = LogParser(
+        log_format=log_format,
+        time_window_minutes=time_window_minutes
+    )
+    parser._window_cutoff = window_cutoff
+    
+    counts = dict.fromkeys(ips, 0)
+    with _map_shard(parser, filepath, stop) as mapped:
+        parser._count_ips_mapped(mapped, counts, start, stop)
+    return counts
+
+
+def _map_shard(parser: LogParser, filepath: str, stop: int) -> mmap.mmap:
+    """
+    Map the first stop bytes of a log file in a worker process.
+    
+    Args:
+        parser: Worker's parser
+        filepath: Path to log file
+        stop: Bytes the shard needs mapped
+        
+    Returns:
+        Read-only memory map
+    """
+    mapped = parser._map_file(filepath, stop)
+    if mapped is None:
+        raise OSError(
+            f"Could not map the first {stop:,} bytes of {filepath}; "
+            f"it may have been truncated while being scanned"
+        )
+    return mapped
+
+
 class AlertManager:
     """
     Manages different types of alerts (console, email, webhook, file).
     """
     
+    __slots__ = ('config', '_alert_files', '_smtp')
+    
     def __init__(self, config: Optional[Dict] = None):
         """
         Initialize alert manager with configuration.
@@ -207,6 +1069,33 @@ class AlertManager:
             config: Dictionary with alert configuration
         """
         self.config = config or {}
+        # Alert files stay open between alerts, keyed by path
+        self._alert_files: Dict[str, TextIO] = {}
+        # SMTP connection opened by the first email alert and reused after
+        self._smtp: Optional[smtplib.SMTP] = None
+    
+    def __enter__(self) -> 'AlertManager':
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def close(self) -> None:
+        """Close alert files and the SMTP connection opened by alerts."""
+        for f in self._alert_files.values():
+            f.close()
+        self._alert_files.clear()
+        self._close_smtp()
+    
+    def _close_smtp(self) -> None:
+        """Quit the SMTP connection, if any, ignoring errors."""
+        if self._smtp is None:
+            return
+        try:
+            self._smtp.quit()
+        except Exception:
+            pass  # Connection is already gone
+        self._smtp = None
     
     def send_console_alert(self, message: str) -> None:
         """Print alert to console."""
@@ -220,6 +1109,9 @@ class AlertManager:
         """
         Send email alert (requires SMTP configuration).
         
+        The SMTP connection, including STARTTLS and login, is set up on the
+        first alert and reused for later ones until close().
+        
         Args:
             message: Alert message to send
         """
@@ -229,45 +1121,63 @@ class AlertManager:
                 print("Email alert skipped: No SMTP configuration provided")
                 return
             
-            msg = MIMEMultipart()
+            msg = EmailMessage()
             msg['From'] = smtp_config.get('from_email')
             msg['To'] = smtp_config.get('to_email')
             msg['Subject'] = '🚨 Log Alert: 500 Error Threshold Exceeded'
+            msg.set_content(message)
             
-            msg.attach(MIMEText(message, 'plain'))
-            
-            server = smtplib.SMTP(
-                smtp_config.get('server'),
-                smtp_config.get('port', 587)
-            )
-            server.starttls()
-            server.login(
-                smtp_config.get('username'),
-                smtp_config.get('password')
-            )
-            server.send_message(msg)
-            server.quit()
+            if self._smtp is None:
+                server = smtplib.SMTP(
+                    smtp_config.get('server'),
+                    smtp_config.get('port', 587)
+                )
+                try:
+                    server.starttls()
+                    server.login(
+                        smtp_config.get('username'),
+                        smtp_config.get('password')
+                    )
+                except Exception:
+                    server.close()  # Do not leak a half-set-up session
+                    raise
+                self._smtp = server
+            self._smtp.send_message(msg)
             
             print("✓ Email alert sent successfully")
             
         except Exception as e:
+            # Reconnect on the next alert rather than reuse a broken session
+            self._close_smtp()
             print(f"✗ Failed to send email alert: {e}")
     
-    def send_file_alert(self, message: str, filepath: str = 'alerts.log') -> None:
+    def send_file_alert(self, message: str, filepath: Optional[str] = None) -> None:
         """
         Write alert to a file.
         
+        The file is opened on first use and kept open until close(); each
+        alert is written with a single buffered write and flushed.
+        
         Args:
             message: Alert message
-            filepath: Path to alert log file
+            filepath: Path to alert log file (default: config 'alert_file'
+                or alerts.log)
         """
+        filepath = filepath or self.config.get('alert_file', 'alerts.log')
         try:
-            with open(filepath, 'a') as f:
-                timestamp = datetime.now().isoformat()
-                f.write(f"\n{'=' * 80}\n")
-                f.write(f"ALERT at {timestamp}\n")
-                f.write(f"{'=' * 80}\n")
-                f.write(message + "\n")
+            f = self._alert_files.get(filepath)
+            if f is None:
+                f = open(filepath, 'a', buffering=64 * 1024)
+                self._alert_files[filepath] = f
+            
+            timestamp = datetime.now().isoformat()
+            f.write(
+                f"\n{'=' * 80}\n"
+                f"ALERT at {timestamp}\n"
+                f"{'=' * 80}\n"
+                f"{message}\n"
+            )
+            f.flush()
             print(f"✓ Alert written to {filepath}")
         except Exception as e:
             print(f"✗ Failed to write alert to file: {e}")
@@ -331,33 +1241,43 @@ def create_sample_log_file(filepath: str = 'sample_server.log', num_lines: int =
     ]
     
     # Make some IPs more likely to have 500 errors
-    error_ips = ['192.168.1.1', '10.0.0.1', '172.16.0.1']
+    error_ips = {'192.168.1.1', '10.0.0.1', '172.16.0.1'}
     
     paths = ['/api/users', '/api/products', '/api/orders', '/health', '/metrics']
     methods = ['GET', 'POST', 'PUT', 'DELETE']
     
+    sizes = range(100, 5001)
+    
     print(f"Generating sample log file: {filepath}")
     
+    # Draw each field for a whole block of lines at once and write the block
+    # with a single call instead of one random call and write per field
+    block_size = 100000
     with open(filepath, 'w') as f:
-        for i in range(num_lines):
-            ip = random.choice(ips)
-            method = random.choice(methods)
-            path = random.choice(paths)
-            
-            # Higher chance of 500 for error_ips
-            if ip in error_ips:
-                status = random.choices([200, 500], weights=[0.7, 0.3])[0]
-            else:
-                status = random.choices([200, 404, 500], weights=[0.85, 0.10, 0.05])[0]
+        for block_start in range(0, num_lines, block_size):
+            k = min(block_size, num_lines - block_start)
             
-            size = random.randint(100, 5000)
+            # Higher chance of 500 for error_ips: draw both distributions
+            # and pick per line by IP
+            error_statuses = random.choices([200, 500], weights=[0.7, 0.3], k=k)
+            other_statuses = random.choices(
+                [200, 404, 500], weights=[0.85, 0.10, 0.05], k=k
+            )
             
             # Apache common log format
-            line = (
+            f.write(''.join([
                 f'{ip} - - [10/Jan/2026:12:00:00 +0000] '
-                f'"{method} {path} HTTP/1.1" {status} {size}\n'
-            )
-            f.write(line)
+                f'"{method} {path} HTTP/1.1" '
+                f'{error_status if ip in error_ips else other_status} {size}\n'
+                for ip, method, path, error_status, other_status, size in zip(
+                    random.choices(ips, k=k),
+                    random.choices(methods, k=k),
+                    random.choices(paths, k=k),
+                    error_statuses,
+                    other_statuses,
+                    random.choices(sizes, k=k),
+                )
+            ]))
     
     print(f"✓ Created {num_lines:,} log lines\n")
 
@@ -408,6 +1328,25 @@ def main():
         metavar='NUM_LINES',
         help='Create a sample log file with NUM_LINES lines'
     )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Worker processes for scanning Apache/Nginx logs (default: 1)'
+    )
+    parser.add_argument(
+        '--max-tracked-ips',
+        type=int,
+        metavar='N',
+        help='Track 500 errors for at most N IPs (Space-Saving sketch); '
+             'bounds memory on high-cardinality logs'
+    )
+    parser.add_argument(
+        '--re2',
+        action='store_true',
+        help='Match lines with Google RE2 for guaranteed linear-time parsing '
+             '(requires google-re2)'
+    )
     parser.add_argument(
         '--config',
         help='Path to JSON configuration file for alerts'
@@ -434,14 +1373,25 @@ def main():
         except Exception as e:
             print(f"Warning: Could not load config file: {e}")
     
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    
+    if args.max_tracked_ips is not None and args.max_tracked_ips < 1:
+        parser.error("--max-tracked-ips must be at least 1")
+    
+    if args.re2 and re2 is None:
+        parser.error("--re2 requires the google-re2 package")
+    
     # Initialize parser and process file
     log_parser = LogParser(
         log_format=args.format,
-        time_window_minutes=args.time_window
+        time_window_minutes=args.time_window,
+        use_re2=args.re2,
+        max_tracked_ips=args.max_tracked_ips
     )
     
     try:
-        log_parser.process_file(args.logfile)
+        log_parser.process_file(args.logfile, workers=args.workers)
     except FileNotFoundError:
         print(f"Error: Log file '{args.logfile}' not found")
         return
@@ -461,8 +1411,23 @@ def main():
     print(f"\nTop {args.top_n} IPs with 500 Errors:")
     print(f"{'-' * 80}")
     
+    try:
+        request_counts = log_parser.get_ip_request_counts(
+            [ip for ip, _ in top_ips], workers=args.workers
+        )
+        if request_counts is None:
+            print("Warning: Log file changed since it was processed; "
+                  "per-IP request totals are unavailable")
+    except Exception as e:
+        print(f"Warning: Could not count requests per IP: {e}")
+        request_counts = None
+    
     for i, (ip, count) in enumerate(top_ips, 1):
-        total = log_parser.ip_total_requests[ip]
+        if request_counts is None:
+            print(f"{i}. {ip:<15} - {count:,} errors "
+                  f"(total requests unavailable)")
+            continue
+        total = request_counts[ip]
         ip_rate = (count / total * 100) if total > 0 else 0
         print(f"{i}. {ip:<15} - {count:,} errors out of {total:,} requests "
               f"({ip_rate:.2f}%)")
@@ -470,8 +1435,8 @@ def main():
     # Check threshold and send alerts if exceeded
     if error_rate > args.threshold:
         print(f"\n⚠️  Error rate ({error_rate:.2f}%) exceeds threshold ({args.threshold:.2f}%)")
-        alert_manager = AlertManager(alert_config)
-        alert_manager.send_alert(top_ips, error_rate, args.threshold, args.alert_types)
+        with AlertManager(alert_config) as alert_manager:
+            alert_manager.send_alert(top_ips, error_rate, args.threshold, args.alert_types)
     else:
         print(f"\n✓ Error rate is within acceptable threshold")
 